@@ -7,30 +7,94 @@ Comprehensive simulation with multiple attack vectors, defense mechanisms, and s
 ⚠️  Never reuse keys or attempt attacks on real wallets.
 """
 
+import bisect
 import hashlib
+import os
 import random
+import sys
 import time
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
-from enum import Enum
+from enum import IntEnum
 from collections import defaultdict
-
-class AddressType(Enum):
-    P2PKH = "P2PKH (Legacy)"
-    P2WPKH = "P2WPKH (SegWit)"
-    P2TR = "P2TR (Taproot)"
-    P2SH_MULTISIG_2OF3 = "P2SH Multisig 2-of-3"
-    P2WSH_MULTISIG_3OF5 = "P2WSH Multisig 3-of-5"
-
-class TxStatus(Enum):
-    CREATED = "Created"
-    BROADCAST = "Broadcast to mempool"
-    ATTACKED = "Under quantum attack"
-    CONFIRMED = "Confirmed in block"
-    STOLEN = "Stolen by quantum attacker"
-    RBF_REPLACED = "Replaced by fee"
-
-@dataclass
+from operator import attrgetter
+
+# Set FAST_SIM=1 to skip explanations, their pauses and per-transaction
+# details (default for BitcoinNetwork.verbose; benchmarks, bulk runs)
+FAST_SIM = bool(os.environ.get("FAST_SIM"))
+
+# Set BQS_ANIMATE=0 to skip the progress bar and all pauses (default for
+# BitcoinNetwork.animate; explanations are still printed)
+ANIMATE = os.environ.get("BQS_ANIMATE", "1") == "1"
+
+# dataclass(slots=True) is only available from Python 3.10
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+def dsha256(data: bytes) -> bytes:
+    """Bitcoin's double SHA-256, used for transaction ids"""
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+# Hash for values that only need to be unique (keys, placeholder txids). Real
+# Bitcoin uses double SHA-256 / HASH160 here, but nothing in the simulation
+# verifies them, so the faster BLAKE2b is enough.
+_fasthash = hashlib.blake2b
+
+class AddressType(IntEnum):
+    P2PKH = 0
+    P2WPKH = 1
+    P2TR = 2
+    P2SH_MULTISIG_2OF3 = 3
+    P2WSH_MULTISIG_3OF5 = 4
+
+    @property
+    def label(self) -> str:
+        return _ADDRESS_TYPE_LABELS[self]
+
+_ADDRESS_TYPE_LABELS = {
+    AddressType.P2PKH: "P2PKH (Legacy)",
+    AddressType.P2WPKH: "P2WPKH (SegWit)",
+    AddressType.P2TR: "P2TR (Taproot)",
+    AddressType.P2SH_MULTISIG_2OF3: "P2SH Multisig 2-of-3",
+    AddressType.P2WSH_MULTISIG_3OF5: "P2WSH Multisig 3-of-5",
+}
+
+# (address, script_pubkey) formats per address type; {h} is the hex pubkey
+# hash (truncated by the precision), {n} the number of required signers
+_ADDR_TEMPLATES: Dict[AddressType, Tuple[str, str]] = {
+    AddressType.P2PKH: ("1{h:.33}", "OP_DUP OP_HASH160 {h:.40} OP_EQUALVERIFY OP_CHECKSIG"),
+    AddressType.P2WPKH: ("bc1q{h:.38}", "OP_0 {h:.40}"),
+    AddressType.P2TR: ("bc1p{h:.58}", "OP_1 {h:.64}"),
+    AddressType.P2SH_MULTISIG_2OF3: ("3{h:.33}", "OP_{n} ... OP_CHECKMULTISIG"),
+    AddressType.P2WSH_MULTISIG_3OF5: ("3{h:.33}", "OP_{n} ... OP_CHECKMULTISIG"),
+}
+
+class TxStatus(IntEnum):
+    CREATED = 0
+    BROADCAST = 1
+    ATTACKED = 2
+    CONFIRMED = 3
+    STOLEN = 4
+    RBF_REPLACED = 5
+
+    @property
+    def label(self) -> str:
+        return _TX_STATUS_LABELS[self]
+
+_TX_STATUS_LABELS = {
+    TxStatus.CREATED: "Created",
+    TxStatus.BROADCAST: "Broadcast to mempool",
+    TxStatus.ATTACKED: "Under quantum attack",
+    TxStatus.CONFIRMED: "Confirmed in block",
+    TxStatus.STOLEN: "Stolen by quantum attacker",
+    TxStatus.RBF_REPLACED: "Replaced by fee",
+}
+
+class AttackStrategy(IntEnum):
+    AGGRESSIVE = 0     # Attack anything over 0.1 BTC
+    SELECTIVE = 1      # Only high-value targets
+    OPPORTUNISTIC = 2  # Medium targets, coin flip
+
+@dataclass(frozen=True, **_SLOTS)
 class QuantumComputer:
     """Represents a quantum computer with specific capabilities"""
     name: str
@@ -38,47 +102,130 @@ class QuantumComputer:
     error_rate: float
     key_derivation_time: float  # seconds
     success_probability: float
+    # Computed once in __post_init__; frozen so the specs cannot go stale
+    can_break_secp256k1: bool = field(init=False, repr=False, compare=False)
 
-    def can_break_secp256k1(self) -> bool:
+    def __post_init__(self):
         """Estimate if quantum computer is powerful enough"""
         # Shor's algorithm needs ~2000-4000 logical qubits for secp256k1
-        return self.qubits >= 2000 and self.error_rate < 0.001
+        object.__setattr__(self, 'can_break_secp256k1',
+                           self.qubits >= 2000 and self.error_rate < 0.001)
 
-@dataclass
+@dataclass(**_SLOTS)
 class Transaction:
     """Detailed transaction structure"""
-    txid: str
+    txid: bytes
     inputs: List['UTXO']
     outputs: List[Dict]
     fee: float
-    pubkeys_exposed: List[str]
-    signatures: List[str]
+    pubkeys_exposed: List[bytes]
+    signatures: List[bytes]
     status: TxStatus
     broadcast_time: float
     confirmation_time: Optional[float] = None
     rbf_enabled: bool = False
     locktime: int = 0
     witness_data: Optional[str] = None
-    competing_txs: List[str] = field(default_factory=list)
+    competing_txs: List[bytes] = field(default_factory=list)
+    attack_details: List[Dict] = field(default_factory=list)
+    # Computed once from the inputs and fee in __post_init__
+    total_input: float = field(init=False, compare=False)
+    fee_rate: float = field(init=False, compare=False)  # fee / total_input
+
+    def __post_init__(self):
+        self.total_input = sum(inp.amount for inp in self.inputs)
+        self.fee_rate = self.fee / self.total_input if self.total_input else 0.0
+
+    @property
+    def txid_hex(self) -> str:
+        return self.txid.hex()
 
-@dataclass
+@dataclass(**_SLOTS)
 class UTXO:
     """Unspent Transaction Output with full details"""
-    txid: str
+    txid: bytes
     vout: int
     address: str
     address_type: AddressType
     amount: float
-    privkey: str
-    pubkey: str
-    pubkey_hash: str
+    privkey: bytes
+    pubkey: bytes
+    pubkey_hash: bytes
     script_pubkey: str
     spent: bool = False
     pubkey_exposed: bool = False
     exposure_count: int = 0  # Track address reuse
     created_block: int = 0
 
-@dataclass
+    # Keys and hashes are kept as raw bytes; hex is only built for display
+    @property
+    def txid_hex(self) -> str:
+        return self.txid.hex()
+
+    @property
+    def privkey_hex(self) -> str:
+        return self.privkey.hex()
+
+    @property
+    def pubkey_hex(self) -> str:
+        return self.pubkey.hex()
+
+    @property
+    def outpoint(self) -> bytes:
+        """Serialized txid:vout reference, as used in transaction inputs"""
+        return self.txid + self.vout.to_bytes(4, 'little')
+
+class UTXOStore:
+    """UTXO set indexed by outpoint; totals are reduced over the UTXO records"""
+
+    def __init__(self):
+        self._utxos: List[UTXO] = []
+        self._index: Dict[Tuple[bytes, int], int] = {}  # (txid, vout) -> idx
+
+    def add(self, utxo: UTXO) -> int:
+        """Store a UTXO and return its index"""
+        key = (utxo.txid, utxo.vout)
+        if key in self._index:
+            raise ValueError(f"UTXO {utxo.txid_hex}:{utxo.vout} is already in the set")
+        self._utxos.append(utxo)
+        idx = len(self._utxos) - 1
+        self._index[key] = idx
+        return idx
+
+    def get(self, txid: bytes, vout: int) -> Optional[UTXO]:
+        """Look up a UTXO by outpoint"""
+        idx = self._index.get((txid, vout))
+        return None if idx is None else self._utxos[idx]
+
+    def total_amount(self) -> float:
+        return sum(u.amount for u in self._utxos)
+
+    def spent_amount(self) -> float:
+        return sum(u.amount for u in self._utxos if u.spent)
+
+    def __getitem__(self, idx: int) -> UTXO:
+        return self._utxos[idx]
+
+    def __iter__(self):
+        return iter(self._utxos)
+
+    def __len__(self) -> int:
+        return len(self._utxos)
+
+# Value a transaction's inputs must exceed, per strategy
+_STRATEGY_MIN_VALUE = {
+    AttackStrategy.AGGRESSIVE: 0.1,
+    AttackStrategy.SELECTIVE: 5.0,
+    AttackStrategy.OPPORTUNISTIC: 1.0,
+}
+
+def _should_attack(strategy: AttackStrategy, total_value: float, rand: float) -> bool:
+    """Attack decision kernel on plain values (rand is uniform in [0, 1))"""
+    if total_value <= _STRATEGY_MIN_VALUE[strategy]:
+        return False
+    return strategy != AttackStrategy.OPPORTUNISTIC or rand > 0.5
+
+@dataclass(**_SLOTS)
 class QuantumAttacker:
     """Sophisticated quantum attacker with strategy"""
     name: str
@@ -87,18 +234,16 @@ class QuantumAttacker:
     successful_attacks: int = 0
     failed_attacks: int = 0
     total_stolen: float = 0.0
-    attack_strategy: str = "AGGRESSIVE"  # AGGRESSIVE, SELECTIVE, OPPORTUNISTIC
+    attack_strategy: AttackStrategy = AttackStrategy.AGGRESSIVE
 
-    def should_attack(self, tx: Transaction) -> bool:
-        """Decide if this transaction is worth attacking"""
-        total_value = sum(inp.amount for inp in tx.inputs)
+    @property
+    def min_target_value(self) -> float:
+        """Input value a transaction must exceed to be considered"""
+        return _STRATEGY_MIN_VALUE[self.attack_strategy]
 
-        if self.attack_strategy == "AGGRESSIVE":
-            return total_value > 0.1  # Attack anything over 0.1 BTC
-        elif self.attack_strategy == "SELECTIVE":
-            return total_value > 5.0  # Only high-value targets
-        else:  # OPPORTUNISTIC
-            return total_value > 1.0 and random.random() > 0.5
+    def should_attack(self, tx: Transaction, rand: float) -> bool:
+        """Decide if this transaction is worth attacking (rand in [0, 1))"""
+        return _should_attack(self.attack_strategy, tx.total_input, rand)
 
     def estimate_attack_time(self, num_keys: int) -> float:
         """Calculate time needed to break N keys"""
@@ -106,69 +251,103 @@ class QuantumAttacker:
         # Parallel processing efficiency
         return base_time * num_keys * 0.7
 
+class BufferedPrinter:
+    """Collects printed lines and writes them to stdout in a single call"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def print(self, *args, sep: str = " ", end: str = "\n"):
+        self._parts.append(sep.join(map(str, args)) + end)
+
+    def flush(self):
+        if self._parts:
+            sys.stdout.write("".join(self._parts))
+            sys.stdout.flush()
+            self._parts.clear()
+
 class BitcoinNetwork:
     """Simulates Bitcoin network with realistic mechanics"""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)  # Pass a seed for reproducible runs
         self.current_block = 850000
         self.current_time = time.time()
         self.block_time_avg = 600  # 10 minutes
-        self.mempool: Dict[str, Transaction] = {}
+        self.mempool: Dict[bytes, Transaction] = {}
+        # Mempool transactions spending each outpoint, filled on broadcast
+        self.outpoint_txs: Dict[bytes, List[Transaction]] = defaultdict(list)
         self.blockchain: List[Dict] = []
-        self.utxo_set: List[UTXO] = []
+        self.utxo_set = UTXOStore()
         self.quantum_attackers: List[QuantumAttacker] = []
         self.network_hash_rate = 600_000_000  # TH/s
         self.difficulty_adjustment = 1.0
+        self.animate = ANIMATE
+        self.verbose = not FAST_SIM  # Explanations and broadcast details
+        self.out = BufferedPrinter()  # Flushed before pauses and at method end
+
+    def explain(self, text: str, pause: float = 0.8):
+        """explain(), silenced when not verbose and unpaused when not animating"""
+        if not self.verbose:
+            return
+        self.out.flush()  # Keep ordering with buffered output before pausing
+        explain(text, pause if self.animate else 0)
+
+    def _random_bytes(self, n: int) -> bytes:
+        """Draw n random bytes from the network's generator in one call"""
+        return self._rng.getrandbits(8 * n).to_bytes(n, 'little')
 
     def create_utxo(self, addr_type: AddressType, amount: float,
                     num_signers: int = 1) -> UTXO:
         """Create a UTXO with cryptographic details"""
-        txid = hashlib.sha256(str(random.random()).encode()).hexdigest()
-
-        # Generate keys
-        privkey = hashlib.sha256(str(random.random()).encode()).hexdigest()
-        pubkey = hashlib.sha256(privkey.encode()).hexdigest()
-        pubkey_hash = hashlib.sha256(pubkey.encode()).hexdigest()[:40]
-
-        # Create script based on address type
-        if addr_type == AddressType.P2PKH:
-            address = f"1{pubkey_hash[:33]}"
-            script = f"OP_DUP OP_HASH160 {pubkey_hash[:40]} OP_EQUALVERIFY OP_CHECKSIG"
-        elif addr_type == AddressType.P2WPKH:
-            address = f"bc1q{pubkey_hash[:38]}"
-            script = f"OP_0 {pubkey_hash[:40]}"
-        elif addr_type == AddressType.P2TR:
-            address = f"bc1p{pubkey_hash[:58]}"
-            script = f"OP_1 {pubkey_hash[:64]}"
-        elif "MULTISIG" in addr_type.value:
-            address = f"3{pubkey_hash[:33]}"
-            script = f"OP_{num_signers} ... OP_CHECKMULTISIG"
-        else:
-            address = f"1{pubkey_hash[:33]}"
-            script = f"OP_DUP OP_HASH160 {pubkey_hash[:40]} OP_EQUALVERIFY OP_CHECKSIG"
-
-        utxo = UTXO(
-            txid=txid,
-            vout=0,
-            address=address,
-            address_type=addr_type,
-            amount=amount,
-            privkey=privkey,
-            pubkey=pubkey,
-            pubkey_hash=pubkey_hash,
-            script_pubkey=script,
-            created_block=self.current_block
-        )
-
-        self.utxo_set.append(utxo)
-        return utxo
+        return self.create_utxos([(addr_type, amount, num_signers)])[0]
+
+    def create_utxos(self, specs: List[Tuple[AddressType, float, int]]) -> List[UTXO]:
+        """Create a batch of UTXOs from (address type, amount, signers) specs"""
+        if not specs:
+            return []
+
+        # One random draw for the whole batch, sliced per UTXO without copying
+        buf = memoryview(self._random_bytes(64 * len(specs)))
+
+        utxos = []
+        for i, (addr_type, amount, num_signers) in enumerate(specs):
+            rand = buf[i * 64:(i + 1) * 64]
+            txid = _fasthash(rand[:32], digest_size=32).digest()
+
+            # Generate keys
+            privkey = _fasthash(rand[32:], digest_size=32).digest()
+            pubkey = _fasthash(privkey, digest_size=32).digest()
+            pubkey_hash = _fasthash(pubkey, digest_size=20).digest()
+
+            address_fmt, script_fmt = _ADDR_TEMPLATES[addr_type]
+            pkh = pubkey_hash.hex()
+            address = address_fmt.format(h=pkh)
+            script = script_fmt.format(h=pkh, n=num_signers)
+
+            utxos.append(UTXO(
+                txid=txid,
+                vout=0,
+                address=address,
+                address_type=addr_type,
+                amount=amount,
+                privkey=privkey,
+                pubkey=pubkey,
+                pubkey_hash=pubkey_hash,
+                script_pubkey=script,
+                created_block=self.current_block
+            ))
+
+        for utxo in utxos:
+            self.utxo_set.add(utxo)
+        return utxos
 
     def create_transaction(self, inputs: List[UTXO], outputs: List[Dict],
                           fee: float, rbf: bool = False) -> Transaction:
         """Create a detailed Bitcoin transaction"""
         # Generate transaction ID
-        tx_data = "".join([u.txid for u in inputs]) + str(random.random())
-        txid = hashlib.sha256(tx_data.encode()).hexdigest()
+        tx_data = b"".join(u.txid for u in inputs) + self._random_bytes(16)
+        txid = dsha256(tx_data)
 
         # Expose public keys (CRITICAL VULNERABILITY POINT)
         pubkeys_exposed = []
@@ -176,15 +355,13 @@ class BitcoinNetwork:
 
         for utxo in inputs:
             if not utxo.pubkey_exposed:
-                explain(f"   🔓 EXPOSING public key for {utxo.address[:20]}...")
+                self.explain(f"   🔓 EXPOSING public key for {utxo.address[:20]}...")
                 utxo.pubkey_exposed = True
                 utxo.exposure_count += 1
 
             pubkeys_exposed.append(utxo.pubkey)
-            # Create signature
-            sig_data = txid + utxo.privkey
-            signature = hashlib.sha256(sig_data.encode()).hexdigest()
-            signatures.append(signature)
+            # Create signature over txid || privkey bytes
+            signatures.append(hashlib.sha256(txid + utxo.privkey).digest())
 
         tx = Transaction(
             txid=txid,
@@ -202,132 +379,148 @@ class BitcoinNetwork:
 
     def broadcast_transaction(self, tx: Transaction):
         """Broadcast transaction to mempool"""
-        print(f"\n   📡 Broadcasting transaction: {tx.txid[:32]}...")
+        self.out.print(f"\n   📡 Broadcasting transaction: {tx.txid_hex[:32]}...")
 
-        # Calculate transaction details
-        total_input = sum(inp.amount for inp in tx.inputs)
-        total_output = sum(out['amount'] for out in tx.outputs)
+        # Transaction details are only formatted when verbose
+        if self.verbose:
+            total_output = sum(out['amount'] for out in tx.outputs)
 
-        print(f"   ├─ Inputs: {len(tx.inputs)} UTXOs = {total_input:.4f} BTC")
-        print(f"   ├─ Outputs: {len(tx.outputs)} recipients = {total_output:.4f} BTC")
-        print(f"   ├─ Fee: {tx.fee:.4f} BTC ({tx.fee/total_input*100:.2f}% of input)")
-        print(f"   ├─ RBF Enabled: {'✓' if tx.rbf_enabled else '✗'}")
-        print(f"   └─ Public Keys Exposed: {len(tx.pubkeys_exposed)}")
+            self.out.print(f"   ├─ Inputs: {len(tx.inputs)} UTXOs = {tx.total_input:.4f} BTC")
+            self.out.print(f"   ├─ Outputs: {len(tx.outputs)} recipients = {total_output:.4f} BTC")
+            self.out.print(f"   ├─ Fee: {tx.fee:.4f} BTC ({tx.fee_rate*100:.2f}% of input)")
+            self.out.print(f"   ├─ RBF Enabled: {'✓' if tx.rbf_enabled else '✗'}")
+            self.out.print(f"   └─ Public Keys Exposed: {len(tx.pubkeys_exposed)}")
 
         for idx, pubkey in enumerate(tx.pubkeys_exposed):
-            print(f"      • Input #{idx}: {pubkey[:40]}...")
-            explain(f"        ⚠️  This public key can be used to derive the private key with Shor's algorithm!", 0.5)
+            if self.verbose:
+                self.out.print(f"      • Input #{idx}: {pubkey.hex()[:40]}...")
+            self.explain(f"        ⚠️  This public key can be used to derive the private key with Shor's algorithm!", 0.5)
 
         tx.status = TxStatus.BROADCAST
         self.mempool[tx.txid] = tx
+        for inp in tx.inputs:
+            self.outpoint_txs[inp.outpoint].append(tx)
 
-        explain(f"Transaction is now in the mempool, visible to all nodes including quantum attackers!", 1.0)
+        self.explain(f"Transaction is now in the mempool, visible to all nodes including quantum attackers!", 1.0)
+        self.out.flush()
 
     def quantum_attack_scan(self):
         """All quantum attackers scan mempool for targets"""
         print_section("⚡ QUANTUM ATTACK PHASE", "█")
 
         if not self.mempool:
-            print("   ✓ Mempool is empty. No targets for quantum attackers.")
+            self.out.print("   ✓ Mempool is empty. No targets for quantum attackers.")
+            self.out.flush()
             return
 
-        explain(f"There are {len(self.quantum_attackers)} quantum attackers monitoring the network...", 1.0)
+        self.explain(f"There are {len(self.quantum_attackers)} quantum attackers monitoring the network...", 1.0)
+
+        # Sort the mempool by value once; each attacker skips to its threshold
+        by_value = sorted(self.mempool.values(), key=attrgetter('total_input'))
+        values = [tx.total_input for tx in by_value]
 
         for attacker in self.quantum_attackers:
-            print(f"\n🤖 {attacker.name} (Quantum Computer: {attacker.quantum_computer.qubits} qubits)")
-            print(f"   Strategy: {attacker.attack_strategy}")
-            print(f"   Success Rate: {attacker.quantum_computer.success_probability*100:.1f}%")
-            print(f"   Key Derivation Time: {attacker.quantum_computer.key_derivation_time:.1f}s per key")
+            self.out.print(f"\n🤖 {attacker.name} (Quantum Computer: {attacker.quantum_computer.qubits} qubits)")
+            self.out.print(f"   Strategy: {attacker.attack_strategy.name}")
+            self.out.print(f"   Success Rate: {attacker.quantum_computer.success_probability*100:.1f}%")
+            self.out.print(f"   Key Derivation Time: {attacker.quantum_computer.key_derivation_time:.1f}s per key")
 
             targets_found = []
 
-            for txid, tx in self.mempool.items():
+            start = bisect.bisect_right(values, attacker.min_target_value)
+            # Only the opportunistic strategy uses the random draw
+            needs_rand = attacker.attack_strategy == AttackStrategy.OPPORTUNISTIC
+
+            for tx in by_value[start:]:
                 if tx.status == TxStatus.ATTACKED:
                     continue  # Already under attack
 
-                if attacker.should_attack(tx):
+                rand = self._rng.random() if needs_rand else 0.0
+                if attacker.should_attack(tx, rand):
                     targets_found.append(tx)
 
             if not targets_found:
-                print(f"   ✓ No suitable targets found (strategy: {attacker.attack_strategy})")
+                self.out.print(f"   ✓ No suitable targets found (strategy: {attacker.attack_strategy.name})")
                 continue
 
-            print(f"   🎯 Found {len(targets_found)} potential target(s)!")
+            self.out.print(f"   🎯 Found {len(targets_found)} potential target(s)!")
 
             for tx in targets_found:
                 self._execute_quantum_attack(attacker, tx)
 
+        self.out.flush()
+
     def _execute_quantum_attack(self, attacker: QuantumAttacker, tx: Transaction):
         """Execute a quantum attack on a specific transaction"""
-        total_value = sum(inp.amount for inp in tx.inputs)
+        total_value = tx.total_input
 
-        print(f"\n   🔬 ATTACKING: {tx.txid[:32]}...")
-        print(f"   ├─ Target Value: {total_value:.4f} BTC")
-        print(f"   ├─ Public Keys to Break: {len(tx.pubkeys_exposed)}")
-        print(f"   └─ Original Fee: {tx.fee:.4f} BTC")
+        self.out.print(f"\n   🔬 ATTACKING: {tx.txid_hex[:32]}...")
+        self.out.print(f"   ├─ Target Value: {total_value:.4f} BTC")
+        self.out.print(f"   ├─ Public Keys to Break: {len(tx.pubkeys_exposed)}")
+        self.out.print(f"   └─ Original Fee: {tx.fee:.4f} BTC")
 
         # Estimate attack time
         attack_time = attacker.estimate_attack_time(len(tx.pubkeys_exposed))
         block_time_remaining = self.block_time_avg - (time.time() - tx.broadcast_time)
 
-        explain(f"Estimated attack time: {attack_time:.1f}s", 0.5)
-        explain(f"Time until next block: ~{block_time_remaining:.1f}s", 0.5)
+        self.explain(f"Estimated attack time: {attack_time:.1f}s", 0.5)
+        self.explain(f"Time until next block: ~{block_time_remaining:.1f}s", 0.5)
 
         if attack_time > block_time_remaining:
-            print(f"   ⚠️  ATTACK TOO SLOW: Block will be mined before attack completes!")
+            self.out.print(f"   ⚠️  ATTACK TOO SLOW: Block will be mined before attack completes!")
             attacker.failed_attacks += 1
             return
 
         # Simulate Shor's algorithm
-        print(f"\n   ⚙️  Running Shor's Algorithm on quantum computer...")
-        print(f"   ├─ Initializing {attacker.quantum_computer.qubits} qubits")
-        print(f"   ├─ Creating superposition states")
-        print(f"   ├─ Applying quantum Fourier transform")
-        print(f"   └─ Measuring and calculating discrete logarithm")
-
-        for i in range(4):
-            progress = (i + 1) * 25
-            bar = '█' * (i + 1) + '░' * (3 - i)
-            print(f"   {bar} {progress}% - Processing qubit entanglements...")
-            time.sleep(0.4)
+        self.out.print(f"\n   ⚙️  Running Shor's Algorithm on quantum computer...")
+        self.out.print(f"   ├─ Initializing {attacker.quantum_computer.qubits} qubits")
+        self.out.print(f"   ├─ Creating superposition states")
+        self.out.print(f"   ├─ Applying quantum Fourier transform")
+        self.out.print(f"   └─ Measuring and calculating discrete logarithm")
+
+        if self.animate:
+            for i in range(4):
+                progress = (i + 1) * 25
+                bar = '█' * (i + 1) + '░' * (3 - i)
+                self.out.print(f"   {bar} {progress}% - Processing qubit entanglements...")
+                self.out.flush()
+                time.sleep(0.4)
 
         # Check success based on quantum computer capabilities
-        if random.random() > attacker.quantum_computer.success_probability:
-            print(f"   ❌ ATTACK FAILED: Quantum decoherence error!")
+        if self._rng.random() > attacker.quantum_computer.success_probability:
+            self.out.print(f"   ❌ ATTACK FAILED: Quantum decoherence error!")
             attacker.failed_attacks += 1
             return
 
-        print(f"   ✅ SUCCESS! Private keys derived:")
+        self.out.print(f"   ✅ SUCCESS! Private keys derived:")
         for idx, inp in enumerate(tx.inputs):
-            print(f"      • Input #{idx}: privkey = {inp.privkey[:40]}...")
+            self.out.print(f"      • Input #{idx}: privkey = {inp.privkey_hex[:40]}...")
 
         # Create competing transaction
-        explain("Creating competing transaction with MAXIMUM FEE...", 1.0)
+        self.explain("Creating competing transaction with MAXIMUM FEE...", 1.0)
 
-        attacker_address = f"bc1q_quantum_attacker_{attacker.name}_{random.randint(1000,9999)}"
+        attacker_address = f"bc1q_quantum_attacker_{attacker.name}_{self._rng.randint(1000,9999)}"
 
         # Calculate attack transaction fee (much higher)
         attack_fee = min(tx.fee * 10, total_value * 0.5)  # 10x or 50% of value
         attack_output_value = total_value - attack_fee
 
-        competing_txid = hashlib.sha256(f"attack{tx.txid}{attacker.name}".encode()).hexdigest()
+        competing_txid = _fasthash(b"attack" + tx.txid + attacker.name.encode(),
+                                   digest_size=32).digest()
 
-        print(f"\n   🏴‍☠️ COMPETING TRANSACTION CREATED:")
-        print(f"   ├─ TxID: {competing_txid[:32]}...")
-        print(f"   ├─ Inputs: Same as victim (double-spend)")
-        print(f"   ├─ Output: {attacker_address}")
-        print(f"   ├─ Amount: {attack_output_value:.4f} BTC")
-        print(f"   └─ Fee: {attack_fee:.4f} BTC (🔥 {attack_fee/tx.fee:.1f}x higher!)")
+        self.out.print(f"\n   🏴‍☠️ COMPETING TRANSACTION CREATED:")
+        self.out.print(f"   ├─ TxID: {competing_txid.hex()[:32]}...")
+        self.out.print(f"   ├─ Inputs: Same as victim (double-spend)")
+        self.out.print(f"   ├─ Output: {attacker_address}")
+        self.out.print(f"   ├─ Amount: {attack_output_value:.4f} BTC")
+        self.out.print(f"   └─ Fee: {attack_fee:.4f} BTC (🔥 {attack_fee/tx.fee:.1f}x higher!)")
 
-        explain("Broadcasting competing transaction to network...", 1.0)
+        self.explain("Broadcasting competing transaction to network...", 1.0)
 
         tx.status = TxStatus.ATTACKED
         tx.competing_txs.append(competing_txid)
 
         # Store attack details
-        if not hasattr(tx, 'attack_details'):
-            tx.attack_details = []
-
         tx.attack_details.append({
             'attacker': attacker.name,
             'competing_txid': competing_txid,
@@ -336,115 +529,154 @@ class BitcoinNetwork:
             'value': attack_output_value
         })
 
-        explain(f"⚠️  CRITICAL: Two transactions now spending the same inputs!", 1.0)
-        explain(f"Miners will choose the one with HIGHER FEE = the quantum attack!", 1.5)
+        self.explain(f"⚠️  CRITICAL: Two transactions now spending the same inputs!", 1.0)
+        self.explain(f"Miners will choose the one with HIGHER FEE = the quantum attack!", 1.5)
+
+    def _conflict_groups(self, tx_list: List[Transaction]) -> List[List[Transaction]]:
+        """Group transactions that share any spent outpoint (double-spends)"""
+        # Union-find over txids: every tx spending an outpoint joins one set
+        parent = {tx.txid: tx.txid for tx in tx_list}
+
+        def find(txid: bytes) -> bytes:
+            while parent[txid] != txid:
+                parent[txid] = parent[parent[txid]]
+                txid = parent[txid]
+            return txid
+
+        for spenders in self.outpoint_txs.values():
+            # Skip transactions no longer in the mempool
+            txids = [tx.txid for tx in spenders if tx.txid in parent]
+            if not txids:
+                continue
+            root = find(txids[0])
+            for txid in txids[1:]:
+                other = find(txid)
+                if other != root:
+                    parent[other] = root
+
+        groups: Dict[bytes, List[Transaction]] = defaultdict(list)
+        for tx in tx_list:
+            groups[find(tx.txid)].append(tx)
+        return list(groups.values())
 
     def mine_block(self):
         """Simulate block mining and transaction selection"""
         print_section(f"⛏️  MINING BLOCK {self.current_block}", "═")
 
         if not self.mempool:
-            print("   ✓ Mempool empty, mining empty block")
+            self.out.print("   ✓ Mempool empty, mining empty block")
+            self.out.flush()
             self.current_block += 1
             return
 
-        explain("Miners are selecting transactions based on fee priority...", 1.0)
+        self.explain("Miners are selecting transactions based on fee priority...", 1.0)
 
         # Sort transactions by fee rate
         tx_list = list(self.mempool.values())
-        tx_list.sort(key=lambda t: t.fee / sum(i.amount for i in t.inputs), reverse=True)
+        tx_list.sort(key=attrgetter('fee_rate'), reverse=True)
 
-        print(f"\n   📋 Transaction Priority Queue (by fee rate):")
+        self.out.print(f"\n   📋 Transaction Priority Queue (by fee rate):")
         for idx, tx in enumerate(tx_list[:5]):
-            fee_rate = tx.fee / sum(i.amount for i in tx.inputs) * 100
+            fee_rate = tx.fee_rate * 100
             status_icon = "⚡" if tx.status == TxStatus.ATTACKED else "✓"
-            print(f"   {idx+1}. {status_icon} {tx.txid[:24]}... | Fee: {tx.fee:.4f} BTC ({fee_rate:.2f}%)")
+            self.out.print(f"   {idx+1}. {status_icon} {tx.txid_hex[:24]}... | Fee: {tx.fee:.4f} BTC ({fee_rate:.2f}%)")
 
         # Process transactions
         confirmed_txs = []
-        double_spend_groups = defaultdict(list)
+        double_spend_groups = self._conflict_groups(tx_list)
 
-        # Group conflicting transactions (double-spends)
-        for tx in tx_list:
-            input_key = tuple(sorted([f"{inp.txid}:{inp.vout}" for inp in tx.inputs]))
-            double_spend_groups[input_key].append(tx)
+        self.explain("\n   🔍 Detecting double-spend attempts...", 1.0)
 
-        explain("\n   🔍 Detecting double-spend attempts...", 1.0)
-
-        for input_key, conflicting_txs in double_spend_groups.items():
+        for conflicting_txs in double_spend_groups:
             if len(conflicting_txs) > 1:
-                print(f"\n   ⚠️  DOUBLE-SPEND DETECTED: {len(conflicting_txs)} transactions spending same inputs!")
+                self.out.print(f"\n   ⚠️  DOUBLE-SPEND DETECTED: {len(conflicting_txs)} transactions spending same inputs!")
 
-                # Sort by fee
+                # Highest fee first; a tx wins unless one of its inputs is
+                # already claimed by a higher-fee winner
                 conflicting_txs.sort(key=lambda t: t.fee, reverse=True)
 
-                winner = conflicting_txs[0]
-                losers = conflicting_txs[1:]
-
-                print(f"   ├─ Winner (highest fee): {winner.txid[:24]}... | Fee: {winner.fee:.4f} BTC")
-
-                if winner.status == TxStatus.ATTACKED:
-                    print(f"   └─ 💀 QUANTUM ATTACK SUCCESSFUL!")
-
-                    for detail in winner.attack_details:
-                        print(f"       • Attacker: {detail['attacker']}")
-                        print(f"       • Stolen: {detail['value']:.4f} BTC")
-                        print(f"       • Destination: {detail['destination']}")
-
-                        # Update attacker stats
-                        for attacker in self.quantum_attackers:
-                            if attacker.name == detail['attacker']:
-                                attacker.successful_attacks += 1
-                                attacker.total_stolen += detail['value']
-                                attacker.btc_balance += detail['value']
-
-                    winner.status = TxStatus.STOLEN
-                else:
-                    print(f"   └─ ✓ Legitimate transaction confirmed")
-                    winner.status = TxStatus.CONFIRMED
+                claimed = set()
+                winners = []
+                losers = []
+                for tx in conflicting_txs:
+                    outpoints = [inp.outpoint for inp in tx.inputs]
+                    if claimed.isdisjoint(outpoints):
+                        claimed.update(outpoints)
+                        winners.append(tx)
+                    else:
+                        losers.append(tx)
+
+                for rank, winner in enumerate(winners):
+                    reason = "highest fee" if rank == 0 else "no conflict with a higher fee"
+                    self.out.print(f"   ├─ Winner ({reason}): {winner.txid_hex[:24]}... | Fee: {winner.fee:.4f} BTC")
+
+                    if winner.status == TxStatus.ATTACKED:
+                        self.out.print(f"   └─ 💀 QUANTUM ATTACK SUCCESSFUL!")
+
+                        for detail in winner.attack_details:
+                            self.out.print(f"       • Attacker: {detail['attacker']}")
+                            self.out.print(f"       • Stolen: {detail['value']:.4f} BTC")
+                            self.out.print(f"       • Destination: {detail['destination']}")
+
+                            # Update attacker stats
+                            for attacker in self.quantum_attackers:
+                                if attacker.name == detail['attacker']:
+                                    attacker.successful_attacks += 1
+                                    attacker.total_stolen += detail['value']
+                                    attacker.btc_balance += detail['value']
+
+                        winner.status = TxStatus.STOLEN
+                    else:
+                        self.out.print(f"   └─ ✓ Legitimate transaction confirmed")
+                        winner.status = TxStatus.CONFIRMED
 
                 for loser in losers:
-                    print(f"   └─ Rejected: {loser.txid[:24]}... (lower fee)")
+                    self.out.print(f"   └─ Rejected: {loser.txid_hex[:24]}... (lower fee)")
 
-                confirmed_txs.append(winner)
+                confirmed_txs.extend(winners)
             else:
                 tx = conflicting_txs[0]
                 tx.status = TxStatus.CONFIRMED
                 confirmed_txs.append(tx)
 
-        print(f"\n   ✓ Block {self.current_block} mined with {len(confirmed_txs)} transaction(s)")
+        self.out.print(f"\n   ✓ Block {self.current_block} mined with {len(confirmed_txs)} transaction(s)")
 
         # Clear mempool
         self.mempool.clear()
+        self.outpoint_txs.clear()
         self.current_block += 1
         self.current_time += self.block_time_avg
+        self.out.flush()
+
+# Full-width separator lines, built once
+_SEP = {c: c * 75 for c in "=█═─"}
 
 def print_section(title: str, symbol: str = "="):
     """Print formatted section header"""
-    print(f"\n{symbol * 75}")
-    print(f"{title.center(75)}")
-    print(f"{symbol * 75}\n")
+    sep = _SEP.get(symbol) or symbol * 75
+    print(f"\n{sep}\n{title.center(75)}\n{sep}\n")
 
 def explain(text: str, pause: float = 0.8):
     """Print explanation with pause"""
     print(f"💡 {text}")
-    time.sleep(pause)
+    if pause:
+        time.sleep(pause)
 
 def step(number: int, title: str, description: str = ""):
     """Print numbered step"""
-    print(f"\n{'═' * 75}")
+    print(f"\n{_SEP['═']}")
     print(f"STEP {number}: {title}")
     if description:
-        print(f"{'─' * 75}")
+        print(f"{_SEP['─']}")
         print(f"{description}")
-    print(f"{'═' * 75}")
+    print(f"{_SEP['═']}")
 
 def run_advanced_simulation():
     """Run comprehensive quantum attack demonstration"""
     print_section("🚀 ADVANCED BITCOIN QUANTUM ATTACK SIMULATOR", "█")
     print("Comprehensive Educational Demonstration with Multiple Attack Scenarios")
     print("⚠️  SIMULATION ONLY - NOT FOR REAL ATTACKS")
-    print("─" * 75)
+    print(_SEP['─'])
 
     # Initialize network
     network = BitcoinNetwork()
@@ -469,24 +701,25 @@ def run_advanced_simulation():
         success_probability=0.85
     )
 
-    attacker1 = QuantumAttacker("QuantumPirate", qc1, attack_strategy="AGGRESSIVE")
-    attacker2 = QuantumAttacker("CryptoThief", qc2, attack_strategy="SELECTIVE")
+    attacker1 = QuantumAttacker("QuantumPirate", qc1, attack_strategy=AttackStrategy.AGGRESSIVE)
+    attacker2 = QuantumAttacker("CryptoThief", qc2, attack_strategy=AttackStrategy.SELECTIVE)
 
     network.quantum_attackers.extend([attacker1, attacker2])
 
     print(f"\n   🤖 Attacker #1: {attacker1.name}")
     print(f"   ├─ Quantum Computer: {qc1.name}")
     print(f"   ├─ Qubits: {qc1.qubits}")
-    print(f"   ├─ Can break secp256k1: {'✓ YES' if qc1.can_break_secp256k1() else '✗ NO'}")
-    print(f"   └─ Strategy: {attacker1.attack_strategy}")
+    print(f"   ├─ Can break secp256k1: {'✓ YES' if qc1.can_break_secp256k1 else '✗ NO'}")
+    print(f"   └─ Strategy: {attacker1.attack_strategy.name}")
 
     print(f"\n   🤖 Attacker #2: {attacker2.name}")
     print(f"   ├─ Quantum Computer: {qc2.name}")
     print(f"   ├─ Qubits: {qc2.qubits}")
-    print(f"   ├─ Can break secp256k1: {'✓ YES' if qc2.can_break_secp256k1() else '✗ NO'}")
-    print(f"   └─ Strategy: {attacker2.attack_strategy}")
+    print(f"   ├─ Can break secp256k1: {'✓ YES' if qc2.can_break_secp256k1 else '✗ NO'}")
+    print(f"   └─ Strategy: {attacker2.attack_strategy.name}")
 
-    time.sleep(2)
+    if network.animate:
+        time.sleep(2)
 
     # Create diverse wallet ecosystem
     step(2, "CREATING BITCOIN WALLET ECOSYSTEM",
@@ -494,25 +727,24 @@ def run_advanced_simulation():
 
     print("\n   👤 Creating wallets:")
 
-    alice_legacy = network.create_utxo(AddressType.P2PKH, 15.5)
-    print(f"   ✓ Alice (Legacy P2PKH): {alice_legacy.amount} BTC - {alice_legacy.address[:30]}...")
+    (alice_legacy, bob_segwit, carol_taproot,
+     dave_multisig, eve_whale, frank_small) = network.create_utxos([
+        (AddressType.P2PKH, 15.5, 1),
+        (AddressType.P2WPKH, 8.2, 1),
+        (AddressType.P2TR, 22.0, 1),
+        (AddressType.P2SH_MULTISIG_2OF3, 50.0, 2),
+        (AddressType.P2WPKH, 100.0, 1),
+        (AddressType.P2PKH, 0.05, 1),
+    ])
 
-    bob_segwit = network.create_utxo(AddressType.P2WPKH, 8.2)
+    print(f"   ✓ Alice (Legacy P2PKH): {alice_legacy.amount} BTC - {alice_legacy.address[:30]}...")
     print(f"   ✓ Bob (SegWit): {bob_segwit.amount} BTC - {bob_segwit.address[:30]}...")
-
-    carol_taproot = network.create_utxo(AddressType.P2TR, 22.0)
     print(f"   ✓ Carol (Taproot): {carol_taproot.amount} BTC - {carol_taproot.address[:30]}...")
-
-    dave_multisig = network.create_utxo(AddressType.P2SH_MULTISIG_2OF3, 50.0, num_signers=2)
     print(f"   ✓ Dave (2-of-3 Multisig): {dave_multisig.amount} BTC - {dave_multisig.address[:30]}...")
-
-    eve_whale = network.create_utxo(AddressType.P2WPKH, 100.0)
     print(f"   ✓ Eve (Whale): {eve_whale.amount} BTC - {eve_whale.address[:30]}...")
-
-    frank_small = network.create_utxo(AddressType.P2PKH, 0.05)
     print(f"   ✓ Frank (Small holder): {frank_small.amount} BTC - {frank_small.address[:30]}...")
 
-    explain(f"\n✓ Total ecosystem: {sum(u.amount for u in network.utxo_set):.2f} BTC across {len(network.utxo_set)} UTXOs", 2.0)
+    network.explain(f"\n✓ Total ecosystem: {network.utxo_set.total_amount():.2f} BTC across {len(network.utxo_set)} UTXOs", 2.0)
 
     # Scenario 1: Small transaction (ignored by attackers)
     step(3, "SCENARIO 1: Small Transaction",
@@ -541,8 +773,8 @@ def run_advanced_simulation():
     )
 
     network.broadcast_transaction(tx2)
-    explain("RBF allows replacing this transaction with a higher fee version", 1.0)
-    explain("But quantum attackers can also use this mechanism!", 1.5)
+    network.explain("RBF allows replacing this transaction with a higher fee version", 1.0)
+    network.explain("But quantum attackers can also use this mechanism!", 1.5)
 
     network.quantum_attack_scan()
     network.mine_block()
@@ -566,8 +798,8 @@ def run_advanced_simulation():
     step(6, "SCENARIO 4: Multisig Transaction",
          "Dave's 2-of-3 multisig - multiple public keys exposed")
 
-    explain("Multisig transactions expose MULTIPLE public keys!", 1.0)
-    explain("Attackers must break multiple keys, increasing attack time", 1.0)
+    network.explain("Multisig transactions expose MULTIPLE public keys!", 1.0)
+    network.explain("Attackers must break multiple keys, increasing attack time", 1.0)
 
     tx4 = network.create_transaction(
         inputs=[dave_multisig],
@@ -592,7 +824,7 @@ def run_advanced_simulation():
     )
 
     network.broadcast_transaction(tx5)
-    explain("⚠️  HIGH-VALUE TARGET: All quantum attackers will attempt this!", 1.5)
+    network.explain("⚠️  HIGH-VALUE TARGET: All quantum attackers will attempt this!", 1.5)
     network.quantum_attack_scan()
     network.mine_block()
 
@@ -605,9 +837,9 @@ def run_advanced_simulation():
     alice_reused.pubkey_exposed = True
     alice_reused.exposure_count = 2
 
-    explain("⚠️  CRITICAL VULNERABILITY: This address was already used!", 1.0)
-    explain("The public key is already known from the previous transaction!", 1.0)
-    explain("Attackers don't need to wait for mempool - they can prepare in advance!", 1.5)
+    network.explain("⚠️  CRITICAL VULNERABILITY: This address was already used!", 1.0)
+    network.explain("The public key is already known from the previous transaction!", 1.0)
+    network.explain("Attackers don't need to wait for mempool - they can prepare in advance!", 1.5)
 
     tx6 = network.create_transaction(
         inputs=[alice_reused],
@@ -617,15 +849,15 @@ def run_advanced_simulation():
     )
 
     network.broadcast_transaction(tx6)
-    explain("Quantum attackers had a HEAD START on this one!", 1.0)
+    network.explain("Quantum attackers had a HEAD START on this one!", 1.0)
     network.quantum_attack_scan()
     network.mine_block()
 
     # Final comprehensive report
     print_section("📊 COMPREHENSIVE SIMULATION REPORT", "█")
 
-    total_btc = sum(u.amount for u in network.utxo_set)
-    spent_btc = sum(u.amount for u in network.utxo_set if u.spent)
+    total_btc = network.utxo_set.total_amount()
+    spent_btc = network.utxo_set.spent_amount()
 
     print(f"Network Statistics:")
     print(f"├─ Current Block: {network.current_block}")
@@ -633,24 +865,25 @@ def run_advanced_simulation():
     print(f"├─ Spent Value: {spent_btc:.2f} BTC")
     print(f"└─ Remaining: {total_btc - spent_btc:.2f} BTC")
 
-    print(f"\n{'─' * 75}")
+    print(f"\n{_SEP['─']}")
     print("Quantum Attacker Results:")
-    print(f"{'─' * 75}")
+    print(f"{_SEP['─']}")
 
     for attacker in network.quantum_attackers:
         print(f"\n🤖 {attacker.name}")
-        print(f"├─ Strategy: {attacker.attack_strategy}")
+        print(f"├─ Strategy: {attacker.attack_strategy.name}")
         print(f"├─ Successful Attacks: {attacker.successful_attacks}")
         print(f"├─ Failed Attacks: {attacker.failed_attacks}")
-        print(f"├─ Success Rate: {attacker.successful_attacks/(attacker.successful_attacks + attacker.failed_attacks)*100:.1f}%"
-              if (attacker.successful_attacks + attacker.failed_attacks) > 0 else "├─ Success Rate: N/A")
+        total_attacks = attacker.successful_attacks + attacker.failed_attacks
+        rate = f"{attacker.successful_attacks/total_attacks*100:.1f}%" if total_attacks else "N/A"
+        print(f"├─ Success Rate: {rate}")
         print(f"├─ Total Stolen: {attacker.total_stolen:.4f} BTC")
         print(f"└─ Current Balance: {attacker.btc_balance:.4f} BTC")
 
     # Educational summary
-    print(f"\n{'═' * 75}")
+    print(f"\n{_SEP['═']}")
     print("📚 KEY INSIGHTS FOR YOUR ARTICLE:")
-    print(f"{'═' * 75}\n")
+    print(f"{_SEP['═']}\n")
 
     insights = [
         ("PUBLIC KEY EXPOSURE IS EVERYTHING",
@@ -699,11 +932,11 @@ def run_advanced_simulation():
         print(f"{idx}. {title}")
         print(f"   {content}\n")
 
-    print(f"{'═' * 75}")
+    print(f"{_SEP['═']}")
     print("⚠️  This simulation demonstrates THEORETICAL attacks only")
     print("Current quantum computers cannot yet break Bitcoin's cryptography")
     print("This represents a future threat requiring proactive mitigation")
-    print(f"{'═' * 75}\n")
+    print(f"{_SEP['═']}\n")
 
 if __name__ == "__main__":
     run_advanced_simulation()